@@ -2,46 +2,812 @@
 # -*- coding: utf-8 -*-
 # The code is based on the idea of iterated greedy algorithm
 
+import heapq
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+
 import numpy as np
 
+# graph in CSR form, the neighbours of v are indices[indptr[v]:indptr[v + 1]]
+Graph = namedtuple("Graph", ['indptr', 'indices', 'degree'])
 
-def greedy(graph, node_list, node_count):
-    solution = [-1] * node_count
+# default search budget of solve_it in seconds
+TIME_LIMIT = 60
+# part of the budget given to the clique lower bound
+CLIQUE_SHARE = 0.1
+# part of the budget given to iterated greedy
+GREEDY_SHARE = 0.3
+# odds of the reverse, largest first and random class orderings in iterated greedy
+GREEDY_ORDERINGS = [0.5, 0.3, 0.2]
+# graphs up to this many vertices are first colored exactly
+EXACT_NODES = 100
+# part of the budget given to the exact coloring
+EXACT_SHARE = 0.3
+# strategies of the parallel portfolio, assigned to the workers in turn
+PORTFOLIO = ('tabucol', 'greedy', 'dsatur')
+# seconds a portfolio worker searches before looking at the shared best coloring
+PORTFOLIO_ROUND = 2
+# iterations of tabucol or partialcol before drop_color switches to the other
+SEARCH_ROUND = 5000
+# partialcol iterations without improvement before trying a Kempe chain move
+KEMPE_STALL = 50
+# uncolored vertices tried by one Kempe chain move
+KEMPE_TRIES = 5
+# colorings kept by the evolutionary search
+HEA_POPULATION = 10
+# tabucol iterations on every offspring, per vertex
+HEA_ITERATIONS = 10
+# offspring closer than this share of the vertices to a member compete with it
+HEA_SIMILARITY = 0.1
+
+
+# build the CSR graph from an (edge_count, 2) array of edges
+def build_graph(edges, node_count):
+    heads = np.concatenate((edges[:, 0], edges[:, 1]))
+    tails = np.concatenate((edges[:, 1], edges[:, 0]))
+    degree = np.bincount(heads, minlength=node_count)
+    indptr = np.zeros(node_count + 1, dtype=int)
+    np.cumsum(degree, out=indptr[1:])
+    indices = tails[np.argsort(heads, kind='stable')]
+    return Graph(indptr, indices, degree)
 
-    # store the color used before
-    current_color = []
 
-    # assign the first color to first vertex
-    solution[node_list[0]] = 0
-    current_color.append(0)
+def greedy(graph, node_list, node_count):
+    solution = np.full(node_count, -1, dtype=int)
+    indptr = graph.indptr
+    indices = graph.indices
+
+    # forbidden[v, c] is set once a neighbour of v takes color c
+    # a vertex never sees more colors than its degree, so degree + 1 columns suffice
+    max_degree = int(graph.degree.max()) if node_count > 0 else 0
+    forbidden = np.zeros((node_count, max_degree + 1), dtype=bool)
 
     '''
-    First step: figure out adjacent color for each vertex
-    Second step: divide into two cases
-                 (a) select color in the current_color list
-                 (b) select color not in the current_color list
+    First step: pick the lowest color not forbidden for the vertex
+    Second step: forbid that color for all of its neighbours
     '''
-    for i in range(1, node_count):
-        adj_color = set()
-        for j in range(0, len(graph[node_list[i]])):
-            if solution[graph[node_list[i]][j]] != -1:
-                adj_color.add(solution[graph[node_list[i]][j]])
-        if len(adj_color) == len(current_color):
-            new_color = len(current_color)
-            current_color.append(new_color)
-            solution[node_list[i]] = new_color
+    for v in node_list:
+        color = int(np.argmin(forbidden[v]))
+        solution[v] = color
+        forbidden[indices[indptr[v]:indptr[v + 1]], color] = True
+    return solution.tolist()
+
+
+# DSATUR: repeatedly color the uncolored vertex with the most distinct colors
+# among its neighbours (ties broken by degree) with its lowest free color
+# the priorities are kept in a heap with lazy deletion, a vertex is pushed
+# again whenever its saturation grows and stale entries are skipped
+# with rng the remaining ties are broken at random instead of by index
+def dsatur(graph, node_count, rng=None):
+    solution = np.full(node_count, -1, dtype=int)
+    indptr = graph.indptr
+    indices = graph.indices
+    degree = graph.degree.tolist()
+
+    max_degree = int(graph.degree.max()) if node_count > 0 else 0
+    forbidden = np.zeros((node_count, max_degree + 1), dtype=bool)
+    saturation = [0] * node_count
+
+    tie = [0.0] * node_count if rng is None else rng.random(node_count).tolist()
+
+    heap = [(0, -degree[v], tie[v], v) for v in range(node_count)]
+    heapq.heapify(heap)
+    while heap:
+        neg_saturation, _, _, v = heapq.heappop(heap)
+        if solution[v] != -1 or -neg_saturation != saturation[v]:
+            continue
+
+        color = int(np.argmin(forbidden[v]))
+        solution[v] = color
+
+        # neighbours that see this color for the first time
+        adj = indices[indptr[v]:indptr[v + 1]]
+        adj = adj[~forbidden[adj, color]]
+        forbidden[adj, color] = True
+        for u in adj[solution[adj] == -1].tolist():
+            saturation[u] += 1
+            heapq.heappush(heap, (-saturation[u], -degree[u], tie[u], u))
+
+    return solution.tolist()
+
+
+# adjacency as python int bitsets, bit u of bits[v] is set for every edge (u, v)
+def adjacency_bits(graph):
+    node_count = len(graph.degree)
+    matrix = np.zeros((node_count, node_count), dtype=bool)
+    heads = np.repeat(np.arange(node_count), graph.degree)
+    matrix[heads, graph.indices] = True
+    rows = np.packbits(matrix, axis=1, bitorder='little')
+    return [int.from_bytes(row.tobytes(), 'little') for row in rows]
+
+
+# greedy clique from every vertex (highest degree first until the deadline)
+# each clique is grown with the candidates in degree order
+def greedy_clique(graph, bits, deadline=None):
+    by_degree = np.argsort(-graph.degree, kind='stable').tolist()
+    best = []
+    for v in by_degree:
+        if graph.degree[v] < len(best) or (deadline is not None and time.time() > deadline):
+            break
+        clique = [v]
+        candidates = bits[v]
+        for u in by_degree:
+            if not candidates:
+                break
+            if (candidates >> u) & 1:
+                clique.append(u)
+                candidates &= bits[u]
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+
+# exact maximum clique by branch & bound on bitsets (Tomita style)
+# candidates are greedily colored, a clique can not grow by more than the
+# number of colors left, which prunes the branch. starts from `clique` and
+# returns the largest clique found when the deadline passes
+def max_clique(bits, clique, deadline):
+    best = list(clique)
+
+    def color_sort(candidates):
+        order = []
+        color = 0
+        while candidates:
+            color += 1
+            available = candidates
+            while available:
+                v = (available & -available).bit_length() - 1
+                available &= ~bits[v] & ~(1 << v)
+                candidates &= ~(1 << v)
+                order.append((v, color))
+        return order
+
+    def expand(current, candidates):
+        nonlocal best
+        if time.time() > deadline:
+            raise TimeoutError
+        for v, color in reversed(color_sort(candidates)):
+            if len(current) + color <= len(best):
+                return
+            current.append(v)
+            remaining = candidates & bits[v]
+            if remaining:
+                expand(current, remaining)
+            elif len(current) > len(best):
+                best = list(current)
+            current.pop()
+            candidates &= ~(1 << v)
+
+    try:
+        expand([], (1 << len(bits)) - 1)
+    except TimeoutError:
+        pass
+    return best
+
+
+# exact coloring by DSATUR branch & bound on bitsets: the vertex with the most
+# distinct colors among its neighbours (then the highest degree) tries every
+# color it can take, the clique is colored first and a vertex may only open
+# the next unused color, which breaks the symmetry between the colors
+# starts from the coloring `solution`, returns the best coloring found and
+# whether it is proven optimal, which it is unless the deadline passes
+def exact_coloring(bits, degree, solution, clique, deadline):
+    node_count = len(bits)
+    best = list(solution)
+    best_count = max(best) + 1
+    lower_bound = len(clique)
+    colors = [-1] * node_count
+    # bit c of saturation[v] is set when a neighbour of v has color c
+    saturation = [0] * node_count
+    uncolored = (1 << node_count) - 1
+    nodes = 0
+
+    # color v with c, returns the uncolored neighbours that see c for the first time
+    def assign(v, c):
+        nonlocal uncolored
+        colors[v] = c
+        uncolored &= ~(1 << v)
+        changed = []
+        adj = bits[v] & uncolored
+        while adj:
+            u = (adj & -adj).bit_length() - 1
+            adj &= ~(1 << u)
+            if not (saturation[u] >> c) & 1:
+                saturation[u] |= 1 << c
+                changed.append(u)
+        return changed
+
+    def unassign(v, c, changed):
+        nonlocal uncolored
+        colors[v] = -1
+        uncolored |= 1 << v
+        for u in changed:
+            saturation[u] &= ~(1 << c)
+
+    # returns True once a coloring meets the lower bound
+    def expand(used):
+        nonlocal best, best_count, nodes
+        nodes += 1
+        if nodes % 1000 == 0 and time.time() > deadline:
+            raise TimeoutError
+        if not uncolored:
+            best = list(colors)
+            best_count = used
+            return best_count == lower_bound
+
+        v = -1
+        key = (-1, -1)
+        candidates = uncolored
+        while candidates:
+            u = (candidates & -candidates).bit_length() - 1
+            candidates &= ~(1 << u)
+            if (bin(saturation[u]).count('1'), degree[u]) > key:
+                key = (bin(saturation[u]).count('1'), degree[u])
+                v = u
+
+        for c in range(used + 1):
+            if c + 1 >= best_count:
+                break
+            if (saturation[v] >> c) & 1:
+                continue
+            changed = assign(v, c)
+            done = expand(max(used, c + 1))
+            unassign(v, c, changed)
+            if done:
+                return True
+        return False
+
+    if best_count == lower_bound:
+        return best, True
+    for c, v in enumerate(clique):
+        assign(v, c)
+    try:
+        expand(lower_bound)
+    except TimeoutError:
+        return best, False
+    return best, True
+
+
+# iterated greedy (Culberson): run greedy over the vertices grouped by their
+# current color class, which never needs more colors than the current coloring
+# the classes are visited in reverse order, largest first or at random and the
+# vertices inside a class by degree. stops at the deadline or the lower bound
+# and returns the best coloring seen
+def iterated_greedy(graph, solution, rng, deadline, lower_bound=1):
+    node_count = len(solution)
+    colors = np.array(solution, dtype=int)
+    best = list(solution)
+    best_count = int(colors.max()) + 1 if node_count > 0 else 0
+    by_degree = np.argsort(-graph.degree, kind='stable')
+
+    while best_count > lower_bound and time.time() < deadline:
+        # split the vertices (in degree order) into their color classes
+        k = int(colors.max()) + 1
+        sizes = np.bincount(colors, minlength=k)
+        grouped = by_degree[np.argsort(colors[by_degree], kind='stable')]
+        classes = np.split(grouped, np.cumsum(sizes)[:-1])
+
+        ordering = rng.choice(3, p=GREEDY_ORDERINGS)
+        if ordering == 0:
+            order = range(k - 1, -1, -1)
+        elif ordering == 1:
+            order = np.argsort(-sizes, kind='stable')
         else:
-            # find the smallest index in current_color that does not appear in adj_color
-            for k in range(len(current_color)-1, -1, -1):
-                if current_color[k] in adj_color:
-                    continue
-                else:
-                    solution[node_list[i]] = current_color[k]
-    return solution
+            order = rng.permutation(k)
+        node_list = np.concatenate([classes[c] for c in order])
+
+        # perform the greedy algorithm
+        colors = np.array(greedy(graph, node_list, node_count))
+        count = int(colors.max()) + 1
+        if count < best_count:
+            best_count = count
+            best = colors.tolist()
+
+    return best
+
+
+# gamma[v, c] counts the neighbours of v with color c, uncolored (-1)
+# neighbours are not counted
+def conflict_table(graph, colors, k):
+    node_count = len(colors)
+    gamma = np.zeros((node_count, k), dtype=int)
+    heads = np.repeat(np.arange(node_count), graph.degree)
+    tails = colors[graph.indices]
+    colored = tails >= 0
+    np.add.at(gamma, (heads[colored], tails[colored]), 1)
+    return gamma
+
+
+# Tabucol: look for a legal coloring with k colors
+# every iteration moves a conflicting vertex to the color with the fewest
+# conflicts, the old (vertex, color) pair stays tabu for a while unless
+# the move reaches a new best. gamma is updated in O(deg) per move
+# returns the coloring with the fewest conflicts found and that count
+def tabucol(graph, colors, k, rng, max_iterations=None, deadline=None):
+    node_count = len(colors)
+    indptr = graph.indptr
+    indices = graph.indices
+    colors = np.array(colors, dtype=int)
+    gamma = conflict_table(graph, colors, k)
+    tabu = np.zeros((node_count, k), dtype=int)
+    nodes = np.arange(node_count)
+
+    conflicts = int(gamma[nodes, colors].sum()) // 2
+    best_colors = colors.copy()
+    best_conflicts = conflicts
+    not_allowed = node_count * k
+
+    iteration = 0
+    while conflicts > 0:
+        if max_iterations is not None and iteration >= max_iterations:
+            break
+        if deadline is not None and iteration % 100 == 0 and time.time() > deadline:
+            break
+        iteration += 1
+
+        # change in conflicts of every move of a conflicting vertex
+        conflicted = np.flatnonzero(gamma[nodes, colors] > 0)
+        own = colors[conflicted]
+        delta = gamma[conflicted] - gamma[conflicted, own][:, None]
+        allowed = (tabu[conflicted] < iteration) | (conflicts + delta < best_conflicts)
+        allowed[np.arange(len(conflicted)), own] = False
+        delta[~allowed] = not_allowed
+
+        # best move, ties broken at random
+        flat = delta.ravel()
+        best_delta = flat.min()
+        if best_delta == not_allowed:
+            continue
+        move = rng.choice(np.flatnonzero(flat == best_delta))
+        v = conflicted[move // k]
+        old_color = colors[v]
+        new_color = move % k
+
+        colors[v] = new_color
+        conflicts += int(best_delta)
+        adj = indices[indptr[v]:indptr[v + 1]]
+        gamma[adj, old_color] -= 1
+        gamma[adj, new_color] += 1
+        tabu[v, old_color] = iteration + rng.integers(10) + int(0.6 * len(conflicted))
+
+        if conflicts < best_conflicts:
+            best_conflicts = conflicts
+            best_colors = colors.copy()
+
+    return best_colors, best_conflicts
+
+
+# give every uncolored vertex the color with the fewest neighbours
+def complete(graph, colors, k):
+    indptr = graph.indptr
+    indices = graph.indices
+    colors = np.array(colors, dtype=int)
+    colors[colors >= k] = -1
+    gamma = conflict_table(graph, colors, k)
+    for v in np.flatnonzero(colors < 0).tolist():
+        c = int(np.argmin(gamma[v]))
+        colors[v] = c
+        gamma[indices[indptr[v]:indptr[v + 1]], c] += 1
+    return colors
+
+
+# the Kempe chain of v in colors a and b: the vertices reached from v by a BFS
+# over the edges between a and b, swapping a and b on it keeps a coloring legal
+def kempe_chain(graph, colors, v, a, b):
+    indptr = graph.indptr
+    indices = graph.indices
+    other = {a: b, b: a}
+    chain = [v]
+    seen = {v}
+    i = 0
+    while i < len(chain):
+        u = chain[i]
+        i += 1
+        adj = indices[indptr[u]:indptr[u + 1]]
+        for w in adj[colors[adj] == other[colors[u]]].tolist():
+            if w not in seen:
+                seen.add(w)
+                chain.append(w)
+    return np.array(chain)
+
+
+# swap the two colors on a Kempe chain and update gamma
+def swap_chain(graph, colors, gamma, chain, a, b):
+    indptr = graph.indptr
+    indices = graph.indices
+    for w in chain.tolist():
+        old_color = colors[w]
+        new_color = a + b - old_color
+        adj = indices[indptr[w]:indptr[w + 1]]
+        gamma[adj, old_color] -= 1
+        gamma[adj, new_color] += 1
+        colors[w] = new_color
+
+
+# Kempe chain move: an uncolored vertex v blocked in color a by a single
+# neighbour u is inserted after swapping a and b on the chain of u
+# the chain is kept when v has no a-colored neighbour left, which follows
+# from the colors of the neighbours of v on the chain alone
+# returns the vertex inserted or None
+def kempe_insert(graph, colors, gamma, k, rng):
+    indptr = graph.indptr
+    indices = graph.indices
+    if k < 2:
+        return None
+    uncolored = np.flatnonzero(colors < 0)
+    for v in rng.permutation(uncolored)[:KEMPE_TRIES].tolist():
+        adj = indices[indptr[v]:indptr[v + 1]]
+        for a in rng.permutation(np.flatnonzero(gamma[v] == 1)).tolist():
+            u = int(adj[colors[adj] == a][0])
+            b = int(rng.integers(k - 1))
+            b += b >= a
+            chain = kempe_chain(graph, colors, u, a, b)
+            touched = colors[chain[np.isin(chain, adj)]]
+            if gamma[v, a] - int((touched == a).sum()) + int((touched == b).sum()) > 0:
+                continue
+            swap_chain(graph, colors, gamma, chain, a, b)
+            colors[v] = a
+            gamma[adj, a] += 1
+            return v
+    return None
+
+
+# PartialCol: look for a legal coloring with k colors among legal partial
+# colorings, the uncolored vertices (-1) are the cost
+# a move gives an uncolored vertex a color and uncolors its neighbours of
+# that color, which may not take it back while tabu
+# when the search stalls Kempe chain moves try to insert a vertex for free
+# returns the best partial coloring and its uncolored vertex count
+def partialcol(graph, colors, k, rng, max_iterations=None, deadline=None):
+    node_count = len(colors)
+    indptr = graph.indptr
+    indices = graph.indices
+    colors = np.array(colors, dtype=int)
+    colors[colors >= k] = -1
+    gamma = conflict_table(graph, colors, k)
+
+    # uncolor conflicting vertices until the coloring is legal
+    for v in np.flatnonzero(gamma[np.arange(node_count), colors] > 0).tolist():
+        c = colors[v]
+        if c >= 0 and gamma[v, c] > 0:
+            colors[v] = -1
+            gamma[indices[indptr[v]:indptr[v + 1]], c] -= 1
 
+    tabu = np.zeros((node_count, k), dtype=int)
+    uncolored_count = int((colors < 0).sum())
+    best_colors = colors.copy()
+    best_uncolored = uncolored_count
+    not_allowed = node_count + 1
 
-def solve_it(input_dataset):
+    iteration = 0
+    stall = 0
+    while uncolored_count > 0:
+        if max_iterations is not None and iteration >= max_iterations:
+            break
+        if deadline is not None and iteration % 100 == 0 and time.time() > deadline:
+            break
+        iteration += 1
+
+        # vertices uncolored by every move of an uncolored vertex
+        uncolored = np.flatnonzero(colors < 0)
+        delta = gamma[uncolored].copy()
+        allowed = (tabu[uncolored] < iteration) | (uncolored_count - 1 + delta < best_uncolored)
+        delta[~allowed] = not_allowed
+
+        # best move, ties broken at random
+        flat = delta.ravel()
+        best_delta = flat.min()
+        if best_delta == not_allowed:
+            continue
+        move = rng.choice(np.flatnonzero(flat == best_delta))
+        v = uncolored[move // k]
+        new_color = move % k
+
+        adj = indices[indptr[v]:indptr[v + 1]]
+        tenure = int(0.6 * len(uncolored))
+        for u in adj[colors[adj] == new_color].tolist():
+            colors[u] = -1
+            gamma[indices[indptr[u]:indptr[u + 1]], new_color] -= 1
+            tabu[u, new_color] = iteration + rng.integers(10) + tenure
+        colors[v] = new_color
+        gamma[adj, new_color] += 1
+        uncolored_count += int(best_delta) - 1
+
+        stall += 1
+        if stall >= KEMPE_STALL:
+            stall = 0
+            if kempe_insert(graph, colors, gamma, k, rng) is not None:
+                uncolored_count -= 1
+        if uncolored_count < best_uncolored:
+            best_uncolored = uncolored_count
+            best_colors = colors.copy()
+            stall = 0
+
+    return best_colors, best_uncolored
+
+
+# peel off vertices of degree < k until none is left: whatever k-coloring the
+# remaining core gets, the peeled vertices can be colored in reverse order
+# returns the core as a bool mask and the peeled vertices in removal order
+def peel(graph, k):
+    indptr = graph.indptr
+    indices = graph.indices
+    degree = graph.degree.copy()
+    removed = degree < k
+    queue = np.flatnonzero(removed).tolist()
+    stack = []
+    while queue:
+        v = queue.pop()
+        stack.append(v)
+        adj = indices[indptr[v]:indptr[v + 1]]
+        adj = adj[~removed[adj]]
+        degree[adj] -= 1
+        adj = adj[degree[adj] < k]
+        removed[adj] = True
+        queue.extend(adj.tolist())
+    return ~removed, stack
+
+
+# graph induced by the vertices in mask, renumbered in their original order
+def subgraph(graph, mask):
+    node_count = len(mask)
+    heads = np.repeat(np.arange(node_count), graph.degree)
+    tails = graph.indices
+    keep = mask[heads] & mask[tails] & (heads < tails)
+    renumber = np.cumsum(mask) - 1
+    edges = np.stack((renumber[heads[keep]], renumber[tails[keep]]), axis=1)
+    return build_graph(edges, int(mask.sum()))
+
+
+# color the peeled vertices in reverse order with their lowest free color
+def unpeel(graph, colors, stack):
+    indptr = graph.indptr
+    indices = graph.indices
+    for v in reversed(stack):
+        adj = indices[indptr[v]:indptr[v + 1]]
+        used = colors[adj]
+        used = used[used >= 0]
+        colors[v] = int(np.argmin(np.bincount(used, minlength=len(adj) + 1) > 0))
+    return colors
+
+
+# try to turn a legal coloring into one with a color less: the vertices of
+# the highest color get a random lower color and the conflicts are repaired
+# on the core left after peeling the vertices of degree below the target
+# the repair alternates rounds of tabucol and partialcol, each starting from
+# where the other stopped, as they get stuck on different plateaus
+# returns the coloring and the conflicts left
+def drop_color(graph, colors, rng, deadline=None):
+    k = int(colors.max())
+    colors = colors.copy()
+    removed = colors == k
+    colors[removed] = rng.integers(k, size=int(removed.sum()))
+
+    core, stack = peel(graph, k)
+    core_graph = subgraph(graph, core) if stack else graph
+    core_colors = colors[core]
+    conflicts = 1
+    use_tabucol = True
+    while conflicts > 0 and (deadline is None or time.time() < deadline):
+        if use_tabucol:
+            core_colors = complete(core_graph, core_colors, k)
+            core_colors, conflicts = tabucol(core_graph, core_colors, k, rng, SEARCH_ROUND, deadline)
+        else:
+            core_colors, conflicts = partialcol(core_graph, core_colors, k, rng, SEARCH_ROUND, deadline)
+        use_tabucol = not use_tabucol
+    core_colors = complete(core_graph, core_colors, k)
+    if not stack:
+        return core_colors, conflicts
+    colors[:] = -1
+    colors[core] = core_colors
+    return unpeel(graph, colors, stack), conflicts
+
+
+# drop one color at a time until the deadline (or the lower bound)
+def reduce_colors(graph, solution, rng, deadline, lower_bound=1):
+    best = np.array(solution, dtype=int)
+    while int(best.max()) + 1 > lower_bound and time.time() < deadline:
+        colors, conflicts = drop_color(graph, best, rng, deadline)
+        if conflicts > 0:
+            break
+        best = colors
+    return best.tolist()
+
+
+# greedy partition crossover: the child takes the largest color class left,
+# from each parent in turn, and the vertices are removed from both parents
+# the vertices left over stay uncolored (-1)
+def gpx(parent_a, parent_b, k):
+    parents = [parent_a.astype(int), parent_b.astype(int)]
+    child = np.full(len(parent_a), -1, dtype=int)
+    for color in range(k):
+        parent = parents[color % 2]
+        left = parent[parent >= 0]
+        if len(left) == 0:
+            break
+        members = parent == np.argmax(np.bincount(left, minlength=k))
+        child[members] = color
+        for parent in parents:
+            parent[members] = -1
+    return child
+
+
+# distance between two colorings as partitions: the vertices to recolor to
+# turn one into the other, with the classes matched greedily by overlap
+def partition_distance(colors_a, colors_b, k):
+    overlap = np.bincount(colors_a.astype(int) * k + colors_b, minlength=k * k).reshape(k, k)
+    matched = 0
+    for i in range(k):
+        a, b = np.unravel_index(np.argmax(overlap), overlap.shape)
+        if overlap[a, b] <= 0:
+            break
+        matched += int(overlap[a, b])
+        overlap[a, :] = -1
+        overlap[:, b] = -1
+    return len(colors_a) - matched
+
+
+# graph of the current process, set once per worker of the evolutionary search
+worker_graph = None
+
+
+def set_worker_graph(graph):
+    global worker_graph
+    worker_graph = graph
+
+
+# complete an offspring and improve it with tabucol
+def improve_offspring(task):
+    colors, k, seed, max_iterations, deadline = task
+    rng = np.random.default_rng(seed)
+    colors = complete(worker_graph, colors, k)
+    return tabucol(worker_graph, colors, k, rng, max_iterations, deadline)
+
+
+# keep the pool diverse: an offspring close to a member may only replace it,
+# any other offspring replaces the member with the most conflicts, either
+# when it has no more conflicts than the member it replaces
+def update_population(population, fitness, child, conflicts, k, rng):
+    distances = np.array([partition_distance(child, member, k) for member in population])
+    closest = int(np.argmin(distances))
+    if distances[closest] < HEA_SIMILARITY * len(child):
+        target = closest
+    else:
+        target = int(rng.choice(np.flatnonzero(fitness == fitness.max())))
+    if conflicts <= fitness[target]:
+        population[target] = child
+        fitness[target] = conflicts
+
+
+# hybrid evolutionary search for a legal coloring with k colors: a population
+# of greedy colorings (the classes past k left to tabucol), offspring from
+# GPX improved by tabucol, one per worker in every generation
+# returns the best coloring and its conflicts
+def evolve(graph, solution, k, rng, deadline, evaluate, workers):
+    node_count = len(solution)
+    max_iterations = HEA_ITERATIONS * node_count
+
+    # the current coloring without its top classes and greedy ones from random orders
+    starts = [np.array(solution, dtype=int)]
+    while len(starts) < HEA_POPULATION:
+        starts.append(np.array(greedy(graph, rng.permutation(node_count), node_count)))
+    tasks = [(colors, k, int(rng.integers(2 ** 32)), max_iterations, deadline) for colors in starts]
+    results = evaluate(improve_offspring, tasks)
+    population = np.array([colors for colors, conflicts in results], dtype=np.int32)
+    fitness = np.array([conflicts for colors, conflicts in results])
+
+    while fitness.min() > 0 and time.time() < deadline:
+        tasks = []
+        for i in range(workers):
+            a, b = rng.choice(HEA_POPULATION, 2, replace=False)
+            tasks.append((gpx(population[a], population[b], k), k, int(rng.integers(2 ** 32)),
+                          max_iterations, deadline))
+        for colors, conflicts in evaluate(improve_offspring, tasks):
+            update_population(population, fitness, colors, conflicts, k, rng)
+
+    best = int(np.argmin(fitness))
+    return population[best].astype(int), int(fitness[best])
+
+
+# drop one color at a time with the evolutionary search until the deadline
+# (or the lower bound), offspring are improved on a pool of worker processes
+def hea(graph, solution, rng, deadline, lower_bound=1, workers=1):
+    best = np.array(solution, dtype=int)
+    pool = None
+    if workers > 1:
+        pool = multiprocessing.get_context().Pool(workers, initializer=set_worker_graph, initargs=(graph,))
+        evaluate = pool.map
+    else:
+        set_worker_graph(graph)
+        evaluate = lambda function, tasks: list(map(function, tasks))
+
+    try:
+        while int(best.max()) + 1 > lower_bound and time.time() < deadline:
+            colors, conflicts = evolve(graph, best, int(best.max()), rng, deadline, evaluate, workers)
+            if conflicts > 0:
+                break
+            best = colors
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return best.tolist()
+
+
+# worker process of the portfolio, runs one strategy with its own seed
+#   'tabucol' - drop colors from the best coloring with tabucol and partialcol
+#   'greedy'  - iterated greedy from the best coloring
+#   'dsatur'  - iterated greedy from fresh randomized DSATUR colorings
+# the best coloring of all workers is shared, a worker falling behind
+# continues from it so that every worker targets one color less than it
+def portfolio_worker(graph, strategy, seed, deadline, lower_bound, best_count, best_colors):
+    rng = np.random.default_rng(seed)
+    node_count = len(graph.degree)
+    colors = np.array(best_colors[:], dtype=int)
+
+    while best_count.value > lower_bound and time.time() < deadline:
+        # catch up with the other workers
+        if int(colors.max()) + 1 > best_count.value:
+            with best_colors.get_lock():
+                colors = np.array(best_colors[:], dtype=int)
+
+        round_deadline = min(deadline, time.time() + PORTFOLIO_ROUND)
+        if strategy == 'tabucol':
+            found, conflicts = drop_color(graph, colors, rng, round_deadline)
+            if conflicts > 0:
+                continue
+        elif strategy == 'greedy':
+            found = np.array(iterated_greedy(graph, colors, rng, round_deadline, lower_bound))
+        else:
+            found = np.array(dsatur(graph, node_count, rng))
+            found = np.array(iterated_greedy(graph, found, rng, round_deadline, lower_bound))
+
+        count = int(found.max()) + 1
+        if count < int(colors.max()) + 1:
+            colors = found
+        # publish the first coloring reaching a new lowest count
+        with best_colors.get_lock():
+            if count < best_count.value:
+                best_colors[:] = found.tolist()
+                best_count.value = count
+
+
+# run independent searches with distinct seeds and strategies on a process
+# pool until the deadline or the lower bound, returns the best coloring found
+def portfolio(graph, solution, deadline, lower_bound=1, workers=None, seed=None):
+    workers = workers or os.cpu_count()
+    ctx = multiprocessing.get_context()
+    best_count = ctx.Value('i', max(solution) + 1)
+    best_colors = ctx.Array('i', list(solution))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+
+    processes = [ctx.Process(target=portfolio_worker,
+                             args=(graph, PORTFOLIO[i % len(PORTFOLIO)], seeds[i], deadline, lower_bound,
+                                   best_count, best_colors))
+                 for i in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    return list(best_colors[:])
+
+
+# renumber the colors used as 0, 1, 2, ...
+def relabel(solution):
+    return np.unique(solution, return_inverse=True)[1].tolist()
+
+
+# time_limit is the search budget in seconds, seed fixes the random choices
+# workers > 1 runs a portfolio of searches on that many processes
+# search='hea' runs the evolutionary search instead, with its offspring
+# improved on the workers
+def solve_it(input_dataset, time_limit=TIME_LIMIT, seed=None, workers=1, search='tabucol'):
     # Modify this code to run your optimization algorithm
+    start = time.time()
+    deadline = start + time_limit
+    rng = np.random.default_rng(seed)
 
     # parse the input
     lines = input_dataset.split('\n')
@@ -50,44 +816,49 @@ def solve_it(input_dataset):
     node_count = int(first_line[0])
     edge_count = int(first_line[1])
 
-    # store the graph information in the list
-    graph = [[] for i in range(node_count)]
-    for i in range(1, edge_count + 1):
-        line = lines[i]
-        parts = line.split()
-        graph[int(parts[0])].append(int(parts[1]))
-        graph[int(parts[1])].append(int(parts[0]))
-
-    # create a dictionary to store the degree
-    degree = dict()
-    for i in range(0, node_count):
-        degree[i] = len(graph[i])
+    # store the graph information in CSR arrays
+    edges = np.array(' '.join(lines[1:edge_count + 1]).split(), dtype=int).reshape(-1, 2)
+    graph = build_graph(edges, node_count)
 
     # find an initial approximate solution
-    node_list = range(0, node_count)
-    solution = greedy(graph, node_list, node_count)
-
-    counter = 0
-    while counter < 10:
-        # group nodes by color
-        num_color = len(set(solution))
-        group_node = [[] for i in range(num_color)]
-        for i in range(0, node_count):
-            group_node[solution[i]].append(i)
-
-        # randomly pick one group
-        # sort the subset by degree in descending order
-        node_list = []
-        permuted_seq = np.random.permutation(range(0, num_color))
-        for i in range(0, num_color):
-            node_list = node_list + sorted(group_node[permuted_seq[i]], key=lambda ele: degree[ele], reverse=True)
+    solution = dsatur(graph, node_count)
 
-        # perform the greedy algorithm
-        solution = greedy(graph, node_list, node_count)
-        counter = counter + 1
+    # a clique needs as many colors as it has vertices
+    # try a quick greedy clique first, then prove the largest one for part of the budget
+    bits = adjacency_bits(graph)
+    clique = greedy_clique(graph, bits, start + CLIQUE_SHARE * time_limit)
+    if len(clique) < len(set(solution)):
+        clique = max_clique(bits, clique, start + CLIQUE_SHARE * time_limit)
+    lower_bound = len(clique)
+
+    # color small graphs exactly for part of the budget, a proven coloring
+    # skips the heuristics, otherwise they start from the best one found
+    proven = False
+    if node_count <= EXACT_NODES:
+        solution, proven = exact_coloring(bits, graph.degree.tolist(), solution, clique,
+                                          time.time() + EXACT_SHARE * time_limit)
+
+    if proven:
+        # nothing left to improve
+        pass
+    elif search == 'hea':
+        # evolve colorings with a color less in the remaining time
+        solution = relabel(hea(graph, solution, rng, deadline, lower_bound, workers))
+    elif workers > 1:
+        # run a portfolio of searches on several processes in the remaining time
+        solution = relabel(portfolio(graph, solution, deadline, lower_bound, workers, seed))
+    else:
+        # improve it with iterated greedy for part of the budget
+        solution = iterated_greedy(graph, solution, rng, time.time() + GREEDY_SHARE * (deadline - time.time()),
+                                   lower_bound)
+
+        # use tabucol to remove colors in the remaining time
+        solution = relabel(reduce_colors(graph, solution, rng, deadline, lower_bound))
 
     # prepare the solution in the specified output format
-    output_data = str(len(set(solution))) + ' ' + str(0) + '\n'
+    # the second field flags a coloring proven optimal or meeting the lower bound
+    optimal = proven or len(set(solution)) == lower_bound
+    output_data = str(len(set(solution))) + ' ' + str(int(optimal)) + '\n'
     output_data += ' '.join(map(str, solution))
 
     return output_data
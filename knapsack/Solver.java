@@ -1,4 +1,5 @@
 import java.io.*;
+import java.util.Arrays;
 import java.util.List;
 import java.util.ArrayList;
 
@@ -13,12 +14,46 @@ public class Solver {
      */
     public static void main(String[] args) {
         try {
-            solve(args);
+            if(Arrays.asList(args).contains("-server")){
+                serve();
+            } else {
+                solve(args);
+            }
         } catch (IOException e) {
             e.printStackTrace();
         }
     }
     
+    /**
+     * Solve instances from the standard input until it is closed.
+     * Every request and every reply is framed as its length in bytes on its own line
+     * followed by the payload.
+     */
+    public static void serve() throws IOException {
+        BufferedReader input = new BufferedReader(new InputStreamReader(System.in, "ISO-8859-1"));
+        Writer output = new BufferedWriter(new OutputStreamWriter(System.out, "ISO-8859-1"));
+
+        String header;
+        while ((header = input.readLine()) != null) {
+            if(header.trim().isEmpty())
+                continue;
+            int length = Integer.parseInt(header.trim());
+            char[] payload = new char[length];
+            int read = 0;
+            while (read < length) {
+                int count = input.read(payload, read, length - read);
+                if(count < 0)
+                    return;
+                read += count;
+            }
+
+            String solution = solveLines(Arrays.asList(new String(payload).split("\n")));
+            output.write(solution.length() + "\n");
+            output.write(solution);
+            output.flush();
+        }
+    }
+    
     /**
      * Read the instance, solve it, and print the solution in the standard output
      */
@@ -48,7 +83,13 @@ public class Solver {
             input.close();
         }
         
-        
+        System.out.print(solveLines(lines));
+    }
+    
+    /**
+     * Solve the instance given as the lines of a data file and return the solution
+     */
+    public static String solveLines(List<String> lines) {
         // parse the data in the file
         String[] firstLine = lines.get(0).split("\\s+");
         int items = Integer.parseInt(firstLine[0]);
@@ -82,10 +123,12 @@ public class Solver {
         }
         
         // prepare the solution in the specified output format
-        System.out.println(value+" 0");
+        StringBuilder solution = new StringBuilder();
+        solution.append(value+" 0\n");
         for(int i=0; i < items; i++){
-            System.out.print(taken[i]+" ");
+            solution.append(taken[i]+" ");
         }
-        System.out.println("");        
+        solution.append("\n");
+        return solution.toString();
     }
 }
\ No newline at end of file
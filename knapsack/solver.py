@@ -1,60 +1,744 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-from collections import namedtuple
-from queue import Queue
+import heapq
+import multiprocessing
+import os
+import sys
+import time
+from bisect import bisect_right
+from collections import deque, namedtuple
+from itertools import accumulate, count
+from queue import Empty
+
+import numpy as np
 
 Item = namedtuple("Item", ['index', 'value', 'weight', 'price'])
 
-
-# Class for Dog
+# largest amount of memory (in bytes) the dynamic programming table may use
+DP_MEMORY_LIMIT = 2 ** 30
+# dense cells per sparse state below which the sparse dp is preferred
+PARETO_RATIO = 64
+# expansions between two looks at the shared incumbent in parallel branch & bound
+BB_SYNC = 256
+# number of items on each side of the break item in the initial core
+CORE_SIZE = 50
+# default search budget of solve_it in seconds
+TIME_LIMIT = 60
+
+
+# Class for a branch & bound node
+# a node only records its own decision and a pointer to its parent,
+# the item set is rebuilt for the winning node only
 class Node:
+    __slots__ = ('level', 'value', 'weight', 'bound', 'parent', 'taken')
+
     # The init method or constructor
-    def __init__(self, level, value, weight, upper_bound):
+    def __init__(self, level, value, weight, upper_bound, parent=None, taken=False):
         # Instance Variable
         self.level = level
         self.value = value
         self.weight = weight
         self.bound = upper_bound
-        self.contains = []
-
-
-def lowerbound(item_count, capacity, items):
-    total_weight = 0
-    value_bound = 0
-    j = 0
+        self.parent = parent
+        self.taken = taken
 
-    while j < item_count and total_weight + items[j].weight <= capacity:
-        total_weight += items[j].weight
-        value_bound += items[j].value
-        j += 1
+    # walk up to the root and collect the index of every item taken
+    def contains(self, items):
+        indices = []
+        node = self
+        while node is not None:
+            if node.taken:
+                indices.append(items[node.level].index)
+            node = node.parent
+        return indices
 
-    return value_bound
 
+# cumulative weight and value of the first k items, k = 0..item_count
+def prefix_sums(items):
+    cum_weight = list(accumulate((item.weight for item in items), initial=0))
+    cum_value = list(accumulate((item.value for item in items), initial=0))
+    return cum_weight, cum_value
 
-def upperbound(node, item_count, capacity, items):
-    if node.weight > capacity:
-        return 0
 
-    total_weight = node.weight
-    value_bound = node.value
-    j = node.level + 1
+# index of the first item from `first` on that no longer fits in capacity
+# (item_count if all of them fit)
+def critical_item(first, capacity, prefix):
+    cum_weight = prefix[0]
+    return bisect_right(cum_weight, cum_weight[first] + capacity, first) - 1
 
-    while j < item_count and total_weight + items[j].weight <= capacity:
-        total_weight += items[j].weight
-        value_bound += items[j].value
-        j += 1
 
-    if j < item_count:
-        value_bound += (capacity - total_weight)*(items[j].value/items[j].weight)
+def lowerbound(item_count, capacity, prefix):
+    j = critical_item(0, capacity, prefix)
+    return prefix[1][j]
 
-    return value_bound
 
+# upper bound of a node over the items sorted by value per weight
+# 'dantzig' - LP relaxation, fill the critical item fractionally
+# 'u2'      - Martello-Toth bound, best of excluding or forcing the critical item
+def upperbound(node, item_count, capacity, items, prefix, method='dantzig'):
+    if node.weight > capacity:
+        return 0
 
-def solve_it(input_dat):
-    # Modify this code to run your optimization algorithm
-
-    # parse the input
+    cum_weight, cum_value = prefix
+    first = node.level + 1
+    j = critical_item(first, capacity - node.weight, prefix)
+    value_bound = node.value + cum_value[j] - cum_value[first]
+    rem_cap = capacity - node.weight - (cum_weight[j] - cum_weight[first])
+
+    if j == item_count:
+        return value_bound
+
+    if method == 'u2':
+        # critical item left out, fill with the next item fractionally
+        u0 = value_bound
+        if j + 1 < item_count:
+            u0 += rem_cap * items[j + 1].value // items[j + 1].weight
+        # critical item forced in, remove part of the previous item
+        u1 = 0
+        if j > first:
+            u1 = value_bound + (items[j].value * items[j - 1].weight
+                                - (items[j].weight - rem_cap) * items[j - 1].value) // items[j - 1].weight
+        return max(u0, u1)
+
+    return value_bound + rem_cap * items[j].value // items[j].weight
+
+
+# memory needed by dynamic_programming: the int64 value row and candidate
+# buffer, the bool take row with its packed copy and one bit per cell, plus
+# 64 KiB for the array headers and the python lists of the reconstruction
+def dp_memory(item_count, capacity):
+    return 17 * (capacity + 1) + (item_count + 1) * ((capacity + 8) // 8) + 2 ** 16
+
+
+# fill a single rolling value row over the items, capacity 0..capacity
+# each item updates the row with a shifted np.maximum, and only a
+# bit-packed take matrix is kept for the reconstruction
+# the candidate values and take flags are written into preallocated buffers
+# raises TimeoutError once the time.time() `deadline` passes
+def dp_table(items, capacity, deadline=None):
+    item_count = len(items)
+    row = np.zeros(capacity + 1, dtype=np.int64)
+    candidate = np.empty(capacity + 1, dtype=np.int64)
+    take = np.zeros((item_count, (capacity + 8) // 8), dtype=np.uint8)
+    take_row = np.zeros(capacity + 1, dtype=bool)
+
+    for i in range(item_count):
+        if deadline is not None and time.time() > deadline:
+            raise TimeoutError
+        weight = items[i].weight
+        if weight > capacity:
+            continue
+        span = capacity + 1 - weight
+        np.add(row[:span], items[i].value, out=candidate[:span])
+        take_row[:weight] = False
+        np.greater(candidate[:span], row[weight:], out=take_row[weight:])
+        np.maximum(row[weight:], candidate[:span], out=row[weight:])
+        take[i] = np.packbits(take_row)
+
+    return row, take
+
+
+# knapsack reconstruction process for any capacity covered by the take matrix
+def dp_taken(items, take, capacity):
+    taken = [0] * len(items)
+    rem_cap = capacity
+    for i in range(len(items) - 1, -1, -1):
+        if (take[i, rem_cap >> 3] >> (7 - (rem_cap & 7))) & 1:
+            taken[i] = 1
+            rem_cap -= items[i].weight
+    return taken
+
+
+# solve the problem exactly with dynamic programming
+def dynamic_programming(items, capacity, deadline=None):
+    row, take = dp_table(items, capacity, deadline)
+    return int(row[capacity]), dp_taken(items, take, capacity)
+
+
+# solve the problem exactly keeping only the non-dominated (weight, value) states
+# the states of each stage are kept in NumPy arrays sorted by weight with
+# strictly increasing value, so the cost depends on the number of states and
+# not on the capacity. returns None as soon as more than max_states states
+# are expected to be stored, raises TimeoutError once the deadline passes
+def pareto_dp(items, capacity, max_states=None, deadline=None):
+    item_count = len(items)
+    weights = np.zeros(1, dtype=np.int64)
+    values = np.zeros(1, dtype=np.int64)
+    stages = []
+    stored = 0
+
+    for i in range(item_count):
+        if deadline is not None and time.time() > deadline:
+            raise TimeoutError
+        weight = items[i].weight
+        fits = weights <= capacity - weight
+        merged_weights = np.concatenate((weights, weights[fits] + weight))
+        merged_values = np.concatenate((values, values[fits] + items[i].value))
+        order = np.argsort(merged_weights, kind='stable')
+        merged_weights = merged_weights[order]
+        merged_values = merged_values[order]
+
+        # drop every state that is not better than a lighter (or equal) state
+        best_before = np.maximum.accumulate(merged_values)
+        keep = np.ones(len(merged_values), dtype=bool)
+        keep[1:] = merged_values[1:] > best_before[:-1]
+        merged_weights = merged_weights[keep]
+        merged_values = merged_values[keep]
+        # among equal weights only the last (and best) state survives
+        keep = np.ones(len(merged_weights), dtype=bool)
+        keep[:-1] = merged_weights[:-1] != merged_weights[1:]
+        weights = merged_weights[keep]
+        values = merged_values[keep]
+
+        # the following stages rarely have fewer states than this one,
+        # give up as soon as the estimated total exceeds max_states
+        stored += len(weights)
+        if max_states is not None and stored + len(weights) * (item_count - i - 1) > max_states:
+            return None
+        stages.append((weights, values))
+
+    # knapsack reconstruction process
+    # a state either exists unchanged in the previous stage or took the item
+    taken = [0] * item_count
+    rem_weight = int(weights[-1])
+    rem_value = int(values[-1])
+    for i in range(item_count - 1, 0, -1):
+        prev_weights, prev_values = stages[i - 1]
+        k = np.searchsorted(prev_weights, rem_weight)
+        if k < len(prev_weights) and prev_weights[k] == rem_weight and prev_values[k] == rem_value:
+            continue
+        taken[i] = 1
+        rem_weight -= items[i].weight
+        rem_value -= items[i].value
+    if item_count > 0 and rem_value > 0:
+        taken[0] = 1
+
+    return int(values[-1]), taken
+
+
+# memory needed by divide_and_conquer: the forward row, plus the backward
+# row and its candidate buffer, all int64 rows of length capacity + 1, plus
+# 64 KiB as in dp_memory
+def row_memory(capacity):
+    return 3 * 8 * (capacity + 1) + 2 ** 16
+
+
+# best value for every capacity 0..capacity using the given items
+# raises TimeoutError once the deadline passes
+def value_row(items, capacity, deadline=None):
+    row = np.zeros(capacity + 1, dtype=np.int64)
+    candidate = np.empty(capacity + 1, dtype=np.int64)
+    for i in range(len(items)):
+        if deadline is not None and time.time() > deadline:
+            raise TimeoutError
+        weight = items[i].weight
+        if weight <= capacity:
+            span = capacity + 1 - weight
+            np.add(row[:span], items[i].value, out=candidate[:span])
+            np.maximum(row[weight:], candidate[:span], out=row[weight:])
+    return row
+
+
+# solve the problem exactly in O(capacity) memory (Hirschberg style)
+# split the items in half, combine the forward row of the first half with the
+# backward row of the second half to find how the capacity is shared,
+# then recurse on both halves until the sub table fits in memory_limit
+# raises TimeoutError once the deadline passes
+def divide_and_conquer(items, capacity, memory_limit, deadline=None):
+    taken = [0] * len(items)
+    stack = [(0, len(items), capacity)]
+
+    while stack:
+        lo, hi, cap = stack.pop()
+        total_weight = sum(items[i].weight for i in range(lo, hi))
+        if total_weight <= cap:
+            taken[lo:hi] = [1] * (hi - lo)
+        elif hi - lo == 1:
+            taken[lo] = 0
+        elif dp_memory(hi - lo, cap) <= memory_limit:
+            _, taken[lo:hi] = dynamic_programming(items[lo:hi], cap, deadline)
+        else:
+            mid = (lo + hi) // 2
+            forward = value_row(items[lo:mid], cap, deadline)
+            backward = value_row(items[mid:hi], cap, deadline)
+            forward += backward[::-1]
+            split = int(np.argmax(forward))
+            # free the rows before the halves are solved
+            del forward, backward
+            stack.append((lo, mid, split))
+            stack.append((mid, hi, cap - split))
+
+    value = sum(items[i].value for i in range(len(items)) if taken[i])
+    return value, taken
+
+
+# branch & bound over the items sorted by value per weight
+# strategy selects the order nodes are explored in:
+#   'best'    - largest upper bound first (binary heap)
+#   'depth'   - depth first (stack)
+#   'breadth' - breadth first (FIFO)
+# the first `dive` expansions are done depth first to find a good incumbent quickly
+# bound selects the upper bound, see upperbound()
+# the search stops at the time.time() `deadline` with the best incumbent found,
+# every new incumbent is passed to callback(value, gap) together with the gap
+# to the largest upper bound still open
+def branch_and_bound(items, capacity, strategy='best', dive=1000, bound='dantzig', deadline=None, callback=None):
+    item_count = len(items)
+    # sort the item by the value per weight
+    items = sorted(items, key=lambda x: x.price, reverse=True)
+
+    # max_profit is the lower bound, start from the greedy solution
+    prefix = prefix_sums(items)
+    max_profit = lowerbound(item_count, capacity, prefix)
+    best_items = [items[j].index for j in range(critical_item(0, capacity, prefix))]
+    best_node = None
+
+    # create a dummy node to start up the bst
+    node = Node(-1, 0, 0, 0)
+    node.bound = upperbound(node, item_count, capacity, items, prefix, bound)
+
+    counter = count()
+    if strategy == 'best':
+        frontier = []
+
+        def push(v):
+            heapq.heappush(frontier, (-v.bound, next(counter), v))
+
+        def pop():
+            return heapq.heappop(frontier)[2]
+    elif strategy == 'depth':
+        frontier = []
+        push = frontier.append
+        pop = frontier.pop
+    else:
+        frontier = deque()
+        push = frontier.append
+        pop = frontier.popleft
+
+    # depth first dive, whatever is left on the stack joins the main frontier
+    stack = [node]
+    if dive <= 0 or strategy == 'depth':
+        push(stack.pop())
+
+    # largest upper bound among the open nodes
+    def open_bound():
+        bounds = [v.bound for v in stack]
+        if strategy == 'best':
+            bounds += [-frontier[0][0]] if frontier else []
+        else:
+            bounds += [v.bound for v in frontier]
+        return max(bounds, default=max_profit)
+
+    expanded = 0
+    peak_frontier = 1
+    gap = 0
+
+    while stack or frontier:
+        if deadline is not None and time.time() > deadline:
+            gap = max(open_bound() - max_profit, 0)
+            break
+
+        diving = stack and expanded < dive
+        if diving:
+            u = stack.pop()
+        else:
+            while stack:
+                push(stack.pop())
+            u = pop()
+
+        if u.bound <= max_profit:
+            if strategy == 'best' and not diving:
+                # every remaining node has a smaller bound
+                break
+            continue
+        # if reach the end, skip the rest code
+        if u.level == item_count - 1:
+            continue
+        expanded += 1
+        level = u.level + 1
+        children = []
+
+        # take the item in the knapsack
+        v = Node(level, u.value + items[level].value, u.weight + items[level].weight, 0, u, True)
+
+        if v.weight <= capacity and v.value > max_profit:
+            max_profit = v.value
+            best_node = v
+            if callback is not None:
+                callback(max_profit, max(u.bound, open_bound()) - max_profit)
+
+        # compute the upper bound
+        v.bound = upperbound(v, item_count, capacity, items, prefix, bound)
+
+        # compare upper bound and max_profit(lower bound)
+        if v.bound > max_profit:
+            children.append(v)
+
+        # Do the same thing but
+        # without taking items in the knapsack
+        v = Node(level, u.value, u.weight, 0, u)
+
+        v.bound = upperbound(v, item_count, capacity, items, prefix, bound)
+        if v.bound > max_profit:
+            children.append(v)
+
+        # the node taking the item is explored first when diving
+        for v in reversed(children):
+            if expanded < dive:
+                stack.append(v)
+            else:
+                push(v)
+        peak_frontier = max(peak_frontier, len(stack) + len(frontier))
+
+    if best_node is not None:
+        best_items = best_node.contains(items)
+
+    stats = {'expanded': expanded, 'peak_frontier': peak_frontier, 'gap': gap}
+    return max_profit, best_items, stats
+
+
+# answer many capacity queries for the same items with a single dp pass
+# the dp runs once up to the largest capacity and the values are read off
+# the final row; the items are only reconstructed for the capacities asked
+# for, from the take matrix when it fits in memory_limit and by divide and
+# conquer otherwise
+class CapacitySweep:
+    def __init__(self, items, max_capacity, memory_limit=DP_MEMORY_LIMIT):
+        self.items = items
+        self.max_capacity = max_capacity
+        self.memory_limit = memory_limit
+        self.solutions = {}
+        if dp_memory(len(items), max_capacity) <= memory_limit:
+            self.row, self.take = dp_table(items, max_capacity)
+        else:
+            self.row = value_row(items, max_capacity)
+            self.take = None
+
+    def value(self, capacity):
+        return int(self.row[min(capacity, self.max_capacity)])
+
+    def taken(self, capacity):
+        capacity = min(capacity, self.max_capacity)
+        if capacity not in self.solutions:
+            if self.take is not None:
+                self.solutions[capacity] = dp_taken(self.items, self.take, capacity)
+            else:
+                self.solutions[capacity] = divide_and_conquer(self.items, capacity, self.memory_limit)[1]
+        return self.solutions[capacity]
+
+
+# expand a node of the sorted items, returns the child nodes
+# (taking the item first) whose upper bound beats max_profit
+def expand(u, items, capacity, prefix, bound, max_profit):
+    item_count = len(items)
+    level = u.level + 1
+    children = []
+
+    v = Node(level, u.value + items[level].value, u.weight + items[level].weight, 0, u, True)
+    v.bound = upperbound(v, item_count, capacity, items, prefix, bound)
+    if v.bound > max_profit:
+        children.append(v)
+
+    v = Node(level, u.value, u.weight, 0, u)
+    v.bound = upperbound(v, item_count, capacity, items, prefix, bound)
+    if v.bound > max_profit:
+        children.append(v)
+    return children
+
+
+# worker process of parallel_branch_and_bound
+# a task is a subtree (level, value, weight, taken item indices) searched best
+# first against the shared incumbent. while other workers wait for tasks,
+# half of the local frontier is handed back to the task queue (work stealing)
+def bb_worker(items, capacity, bound, deadline, tasks, results, incumbent, pending, idle):
+    item_count = len(items)
+    prefix = prefix_sums(items)
+    counter = count()
+    best_value = 0
+    best_items = None
+    expanded = 0
+    peak_frontier = 0
+    timed_out = False
+
+    while True:
+        with idle.get_lock():
+            idle.value += 1
+        task = None
+        while task is None:
+            try:
+                task = tasks.get(timeout=0.01)
+            except Empty:
+                if pending.value == 0:
+                    break
+        with idle.get_lock():
+            idle.value -= 1
+        if task is None:
+            break
+
+        level, value, weight, contains = task
+        root = Node(level, value, weight, 0)
+        root.bound = upperbound(root, item_count, capacity, items, prefix, bound)
+        frontier = [(-root.bound, next(counter), root)]
+        max_profit = incumbent.value
+        if deadline is not None and time.time() > deadline:
+            timed_out = True
+            frontier = []
+
+        while frontier:
+            u = heapq.heappop(frontier)[2]
+            # every remaining node has a smaller bound
+            if u.bound <= max_profit:
+                break
+            if u.level == item_count - 1:
+                continue
+            expanded += 1
+
+            for v in expand(u, items, capacity, prefix, bound, max_profit):
+                if v.taken and v.weight <= capacity and v.value > max_profit:
+                    max_profit = v.value
+                    if v.value > best_value:
+                        best_value = v.value
+                        best_items = contains + tuple(v.contains(items))
+                    with incumbent.get_lock():
+                        incumbent.value = max(incumbent.value, v.value)
+                if v.bound > max_profit:
+                    heapq.heappush(frontier, (-v.bound, next(counter), v))
+            peak_frontier = max(peak_frontier, len(frontier))
+
+            if expanded % BB_SYNC == 0:
+                if deadline is not None and time.time() > deadline:
+                    timed_out = True
+                    break
+                max_profit = max(max_profit, incumbent.value)
+                # hand over every other open node to the idle workers
+                if idle.value > 0 and len(frontier) > 1:
+                    donated = frontier[1::2]
+                    frontier = frontier[0::2]
+                    heapq.heapify(frontier)
+                    with pending.get_lock():
+                        pending.value += len(donated)
+                    for _, _, v in donated:
+                        tasks.put((v.level, v.value, v.weight, contains + tuple(v.contains(items))))
+
+        with pending.get_lock():
+            pending.value -= 1
+
+    results.put((best_value, best_items, expanded, peak_frontier, timed_out))
+
+
+# branch & bound on a pool of worker processes
+# the tree is split breadth first down to split_depth, the subtrees are
+# searched by bb_worker and the incumbent is shared through shared memory
+# the subtrees are always searched best first, there is no depth first dive
+# every increase of the shared incumbent is passed to callback(value, gap)
+# together with the gap to the root bound
+def parallel_branch_and_bound(items, capacity, workers=None, split_depth=None, bound='dantzig', deadline=None,
+                              callback=None):
+    item_count = len(items)
+    workers = workers or os.cpu_count()
+    # sort the item by the value per weight
+    items = sorted(items, key=lambda x: x.price, reverse=True)
+    prefix = prefix_sums(items)
+
+    # max_profit is the lower bound, start from the greedy solution
+    max_profit = lowerbound(item_count, capacity, prefix)
+    best_items = [items[j].index for j in range(critical_item(0, capacity, prefix))]
+
+    # about eight subtrees per worker
+    if split_depth is None:
+        split_depth = workers.bit_length() + 3
+    node = Node(-1, 0, 0, 0)
+    node.bound = upperbound(node, item_count, capacity, items, prefix, bound)
+    split = [node]
+    for depth in range(min(split_depth, item_count)):
+        children = []
+        for u in split:
+            for v in expand(u, items, capacity, prefix, bound, max_profit):
+                if v.taken and v.weight <= capacity and v.value > max_profit:
+                    max_profit = v.value
+                    best_items = v.contains(items)
+                children.append(v)
+        split = [v for v in children if v.bound > max_profit and v.level < item_count - 1]
+
+    ctx = multiprocessing.get_context()
+    tasks = ctx.Queue()
+    results = ctx.Queue()
+    incumbent = ctx.Value('q', max_profit)
+    pending = ctx.Value('i', len(split))
+    idle = ctx.Value('i', 0)
+    for v in split:
+        tasks.put((v.level, v.value, v.weight, tuple(v.contains(items))))
+
+    processes = [ctx.Process(target=bb_worker,
+                             args=(items, capacity, bound, deadline, tasks, results, incumbent, pending, idle))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    expanded = 0
+    peak_frontier = len(split)
+    timed_out = False
+    reported = max_profit
+    finished = 0
+    while finished < workers:
+        try:
+            result = results.get(timeout=0.05)
+        except Empty:
+            result = None
+        # stream the improvements the workers made to the shared incumbent
+        if callback is not None and incumbent.value > reported:
+            reported = incumbent.value
+            callback(reported, max(node.bound - reported, 0))
+        if result is None:
+            continue
+        finished += 1
+        value, contains, worker_expanded, worker_peak, worker_timed_out = result
+        timed_out = timed_out or worker_timed_out
+        if contains is not None and value > max_profit:
+            max_profit = value
+            best_items = list(contains)
+        expanded += worker_expanded
+        peak_frontier = max(peak_frontier, worker_peak)
+    for process in processes:
+        process.join()
+
+    # subtrees left when the deadline passed, only the root bound is proven
+    gap = max(node.bound - max_profit, 0) if timed_out else 0
+    stats = {'expanded': expanded, 'peak_frontier': peak_frontier, 'gap': gap}
+    return max_profit, best_items, stats
+
+
+# LP relaxation over the items sorted by value per weight
+# returns the LP bound and the |reduced cost| of every item, both scaled by
+# the weight of the break item b to stay in integers
+def lp_relaxation(items, capacity, prefix, b):
+    cum_weight, cum_value = prefix
+    wb = items[b].weight
+    pb = items[b].value
+    lp_bound = cum_value[b] * wb + (capacity - cum_weight[b]) * pb
+    reduced = [abs(item.value * wb - item.weight * pb) for item in items]
+    return lp_bound, reduced
+
+
+# greedy incumbent, take every item that still fits in value per weight order
+def greedy_fill(items, capacity):
+    chosen = []
+    for item in items:
+        if item.weight <= capacity:
+            capacity -= item.weight
+            chosen.append(item)
+    return chosen
+
+
+# reduced cost variable fixing
+# an item whose reduced cost bound (LP bound - |reduced cost|) does not beat
+# the greedy incumbent keeps its LP value in every better solution
+# returns the items fixed in the knapsack, the items left free, the greedy
+# incumbent (which the residual problem may not be able to reach) and the LP bound
+def reduce_items(items, capacity):
+    item_count = len(items)
+    items = sorted(items, key=lambda x: x.price, reverse=True)
+    prefix = prefix_sums(items)
+    incumbent = greedy_fill(items, capacity)
+
+    # break item, everything fits if there is none
+    b = critical_item(0, capacity, prefix)
+    if b == item_count:
+        return items, [], incumbent, prefix[1][b]
+
+    lp_bound, reduced = lp_relaxation(items, capacity, prefix, b)
+    threshold = (sum(item.value for item in incumbent) + 1) * items[b].weight
+
+    fixed = []
+    free = []
+    for j in range(item_count):
+        if lp_bound - reduced[j] >= threshold:
+            free.append(items[j])
+        elif j < b:
+            fixed.append(items[j])
+    return fixed, free, incumbent, lp_bound // items[b].weight
+
+
+# exact solver for large problems (expanding core)
+# items are sorted by value per weight; items well before the break item are
+# fixed in the knapsack, items well after it are fixed out, and only the core
+# around the break item is solved with `solve`. an item outside the core whose
+# reduced cost bound does not beat the incumbent can not be flipped in any
+# better solution, otherwise it is added to the core and the core is solved again
+# solve(core_items, capacity, offset) returns the value, the chosen item indices
+# and the gap it left open, offset being the value of the items fixed around it
+# returns the value, the chosen item indices and the gap to the LP bound
+# (0 once optimality is proven); the search stops early at the `deadline`
+# or when `solve` could not close its own gap
+def core_solve(items, capacity, solve, core_size=CORE_SIZE, deadline=None, callback=None):
+    item_count = len(items)
+    items = sorted(items, key=lambda x: x.price, reverse=True)
+    prefix = prefix_sums(items)
+    cum_value = prefix[1]
+
+    # break item, everything fits if there is none
+    b = critical_item(0, capacity, prefix)
+    if b == item_count:
+        return cum_value[b], [item.index for item in items], 0
+
+    lp_bound, reduced = lp_relaxation(items, capacity, prefix, b)
+    upper = lp_bound // items[b].weight
+
+    # start from the greedy solution
+    best_value = cum_value[b]
+    best_items = [items[j].index for j in range(b)]
+
+    core = set(range(max(0, b - core_size), min(item_count, b + core_size + 1)))
+    while True:
+        # items before the break item outside the core are fixed in the knapsack
+        fixed = [j for j in range(b) if j not in core]
+        core_items = [items[j] for j in sorted(core)]
+        offset = sum(items[j].value for j in fixed)
+        value, chosen, gap = solve(core_items, capacity - sum(items[j].weight for j in fixed), offset)
+        value += offset
+        if value > best_value:
+            best_value = value
+            best_items = [items[j].index for j in fixed] + chosen
+            if callback is not None:
+                callback(best_value, upper - best_value)
+        if gap > 0 or (deadline is not None and time.time() > deadline):
+            return best_value, best_items, upper - best_value
+
+        # items outside the core that could still lead to a better solution
+        threshold = (best_value + 1) * items[b].weight
+        outside = [j for j in range(item_count) if j not in core and lp_bound - reduced[j] >= threshold]
+        if not outside:
+            return best_value, best_items, 0
+        core.update(outside)
+
+
+# group identical (value, weight) items and split each group of m copies into
+# bundles of 1, 2, 4, ... copies (binary splitting), any count 0..m is then a
+# choice of bundles. returns the bundles as items and the original indices
+# behind each bundle
+def bundle_items(items):
+    groups = {}
+    for item in items:
+        groups.setdefault((item.value, item.weight), []).append(item.index)
+
+    bundles = []
+    members = []
+    for (value, weight), indices in groups.items():
+        start = 0
+        size = 1
+        while start < len(indices):
+            size = min(size, len(indices) - start)
+            bundles.append(Item(len(bundles), value * size, weight * size, value / weight))
+            members.append(indices[start:start + size])
+            start += size
+            size *= 2
+
+    return bundles, members
+
+
+# parse the input, returns the items and the capacity
+def parse_items(input_dat):
     lines = input_dat.split('\n')
 
     first_line = lines[0].split()
@@ -68,97 +752,135 @@ def solve_it(input_dat):
         parts = line.split()
         items.append(Item(i - 1, int(parts[0]), int(parts[1]), int(parts[0])/int(parts[1])))
 
-    # small(easy) problem
-    # use dynamic programming to find the optimal solution
-    # large scale problem
-    # use branch&bound to find the approximate solution
-    taken = [0] * item_count
-
-    if item_count <= 200:
-        # create a memo matrix to store value
-        memo = [[0 for j in range(capacity + 1)] for i in range(item_count + 1)]
-
-        # build upon the memo matrix
-        for i in range(item_count):
-            for j in range(capacity + 1):
-                if j < items[i].weight:
-                    memo[i + 1][j] = memo[i][j]
-                else:
-                    memo[i + 1][j] = max(memo[i][j], memo[i][j - items[i].weight] + items[i].value)
-
-        # knapsack reconstruction process
-        rem_cap = capacity
-        for i in range(item_count, 0, -1):
-            if items[i - 1].weight <= rem_cap:
-                if memo[i - 1][rem_cap - items[i - 1].weight] + items[i - 1].value >= memo[i][rem_cap]:
-                    taken[i - 1] = 1
-                    rem_cap = rem_cap - items[i - 1].weight
-
-        value = memo[item_count][capacity]
-    else:
-        # branch & bound implementation
-        # sort the item by the value per weight
-        items = sorted(items, key=lambda x: x.price, reverse=True)
-
-        # max_profit is the lower bound
-        max_profit = lowerbound(item_count, capacity, items)
-        best_items = []
-
-        # create a dummy node to start up the bst
-        node = Node(-1, 0, 0, 0)
-
-        # push element to the queue
-        q = Queue()
-        q.put(node)
-
-        while not q.empty():
-            v = Node(0, 0, 0, 0)
-            u = q.get()
-            # if starting node, assign level 0
-            # if reach the end, skip the rest code
-            if u.level == -1:
-                v.level = 0
-            elif u.level == item_count - 1:
-                continue
-            else:
-                # else increment the level
-                v.level = u.level + 1
-
-            v.weight = u.weight + items[v.level].weight
-            v.value = u.value + items[v.level].value
-            v.contains = list(u.contains)
-            v.contains.append(items[v.level].index)
+    return items, capacity
 
-            if v.weight <= capacity and v.value > max_profit:
-                max_profit = v.value
-                best_items = v.contains
 
-            # compute the upper bound
-            v.bound = upperbound(v, item_count, capacity, items)
+# solve the instance for every capacity in capacities (the capacity in the
+# input is ignored) with one dp pass, returns one output per capacity
+def solve_capacities(input_dat, capacities, memory_limit=DP_MEMORY_LIMIT):
+    items, _ = parse_items(input_dat)
+    sweep = CapacitySweep(items, max(capacities), memory_limit)
 
-            # compare upper bound and max_profit(lower bound)
-            if v.bound > max_profit:
-                q.put(v)
+    outputs = []
+    for capacity in capacities:
+        output_data = str(sweep.value(capacity)) + ' ' + str(1) + '\n'
+        output_data += ' '.join(map(str, sweep.taken(capacity)))
+        outputs.append(output_data)
+    return outputs
 
-            # Do the same thing but
-            # without taking items in the knapsack
-            v = Node(0, 0, 0, 0)
-            v.level = u.level + 1
-            v.weight = u.weight
-            v.value = u.value
-            v.contains = list(u.contains)
 
-            v.bound = upperbound(v, item_count, capacity, items)
-            if v.bound > max_profit:
-                q.put(v)
+# time_limit (seconds) stops the search with the best solution found so far,
+# None searches until optimality is proven, which may never happen
+# callback(value, gap, elapsed) receives every improvement of the incumbent
+# with the gap to the LP bound and the elapsed time
+# workers > 1 runs the branch & bound on that many processes, always best
+# first: strategy and dive only apply to the single process search
+def solve_it(input_dat, memory_limit=DP_MEMORY_LIMIT, strategy='best', dive=1000, bound='dantzig',
+             core_size=CORE_SIZE, time_limit=TIME_LIMIT, callback=None, workers=1, verbose=False):
+    # Modify this code to run your optimization algorithm
+    start = time.time()
+    deadline = None if time_limit is None else start + time_limit
 
-        value = max_profit
+    # parse the input
+    items, capacity = parse_items(input_dat)
+    item_count = len(items)
+
+    # identical items are searched as bundles of 1, 2, 4, ... copies
+    bundles, members = bundle_items(items)
+
+    # fix the items the LP reduced costs decide, only the rest is searched
+    # by a core around the break item
+    fixed, free, incumbent, upper = reduce_items(bundles, capacity)
+    fixed_value = sum(item.value for item in fixed)
+    if verbose:
+        print('reduction: %d of %d items fixed (%d items in %d bundles)'
+              % (len(bundles) - len(free), len(bundles), item_count, len(bundles)), file=sys.stderr)
+
+    # pass on every improvement of the overall incumbent
+    best_reported = sum(item.value for item in incumbent)
+
+    def report(sub_value, offset):
+        nonlocal best_reported
+        if sub_value + offset > best_reported:
+            best_reported = sub_value + offset
+            if callback is not None:
+                callback(best_reported, upper - best_reported, time.time() - start)
+
+    if callback is not None:
+        callback(best_reported, upper - best_reported, time.time() - start)
+
+    # exact solver for a set of items, returns the value, the chosen item indices
+    # and the gap left open
+    # problem with few non-dominated states
+    # use sparse dynamic programming to find the optimal solution
+    # problem whose dp table fits in memory
+    # use dynamic programming to find the optimal solution
+    # problem whose dp rows fit in memory
+    # use divide and conquer dynamic programming to find the optimal solution
+    # otherwise
+    # use branch&bound to find the optimal solution
+    def exact(sub_items, sub_capacity, offset):
+        # a sparse state costs about as much time as a few dozen dense cells,
+        # sparse dp is used whenever its states stay well below the dense table
+        max_states = min(memory_limit // 16, len(sub_items) * (sub_capacity + 1) // PARETO_RATIO)
+        try:
+            sparse = pareto_dp(sub_items, sub_capacity, max_states, deadline)
+            if sparse is not None:
+                sub_value, sub_taken = sparse
+            elif dp_memory(len(sub_items), sub_capacity) <= memory_limit:
+                sub_value, sub_taken = dynamic_programming(sub_items, sub_capacity, deadline)
+            elif row_memory(sub_capacity) <= memory_limit:
+                # the full table is too large, recover the items by divide and conquer
+                sub_value, sub_taken = divide_and_conquer(sub_items, sub_capacity, memory_limit, deadline)
+            else:
+                sub_taken = None
+        except TimeoutError:
+            # out of time inside a dp, fall back to the greedy solution and
+            # leave the gap to the LP bound of the items open
+            sorted_items = sorted(sub_items, key=lambda x: x.price, reverse=True)
+            chosen = greedy_fill(sorted_items, sub_capacity)
+            sub_value = sum(item.value for item in chosen)
+            root = Node(-1, 0, 0, 0)
+            sub_bound = upperbound(root, len(sorted_items), sub_capacity, sorted_items, prefix_sums(sorted_items))
+            return sub_value, [item.index for item in chosen], max(sub_bound - sub_value, 0)
+
+        if sub_taken is None:
+            # branch & bound implementation
+            if workers > 1:
+                sub_value, sub_best, stats = parallel_branch_and_bound(
+                    sub_items, sub_capacity, workers, bound=bound, deadline=deadline,
+                    callback=lambda v, gap: report(v, offset + fixed_value))
+                report(sub_value, offset + fixed_value)
+            else:
+                sub_value, sub_best, stats = branch_and_bound(sub_items, sub_capacity, strategy, dive, bound,
+                                                              deadline, lambda v, gap: report(v, offset + fixed_value))
+            if verbose:
+                print('branch & bound (%s): %d nodes expanded, peak frontier %d, gap %d'
+                      % (strategy if workers <= 1 else '%d workers' % workers,
+                         stats['expanded'], stats['peak_frontier'], stats['gap']), file=sys.stderr)
+            return sub_value, sub_best, stats['gap']
+        return sub_value, [sub_items[i].index for i in range(len(sub_items)) if sub_taken[i]], 0
+
+    value, best_items, gap = core_solve(free, capacity - sum(item.weight for item in fixed), exact, core_size,
+                                        deadline, lambda v, core_gap: report(v, fixed_value))
+    value += fixed_value
+    best_items += [item.index for item in fixed]
+    if sum(item.value for item in incumbent) > value:
+        value = sum(item.value for item in incumbent)
+        best_items = [item.index for item in incumbent]
+    if gap > 0:
+        gap = upper - value
+    if verbose:
+        print('value %d, gap %d, %.2fs' % (value, gap, time.time() - start), file=sys.stderr)
 
-        for i in range(len(best_items)):
-            taken[best_items[i]] = 1
+    taken = [0] * item_count
+    for i in range(len(best_items)):
+        for j in members[best_items[i]]:
+            taken[j] = 1
 
     # prepare the solution in the specified output format
-    output_data = str(value) + ' ' + str(0) + '\n'
+    # the second field flags a solution proven optimal
+    output_data = str(value) + ' ' + str(int(gap == 0)) + '\n'
     output_data += ' '.join(map(str, taken))
     return output_data
 
@@ -2,24 +2,84 @@
 # -*- coding: utf-8 -*-
 
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
 from subprocess import Popen, PIPE
 
-def solve_it(input_data):
 
-    # Writes the inputData to a temporay file
+# pool of long-lived `java Solver -server` processes
+# instances are streamed over the pipes, every request and reply is framed as
+# its length in bytes on its own line followed by the payload
+class SolverPool:
+    def __init__(self, size=None):
+        self.size = size or os.cpu_count()
+        self.idle = Queue()
+        for i in range(self.size):
+            self.idle.put(self.start())
 
-    tmp_file_name = 'tmp.data'
-    tmp_file = open(tmp_file_name, 'w')
-    tmp_file.write(input_data)
-    tmp_file.close()
+    @staticmethod
+    def start():
+        return Popen(['java', 'Solver', '-server'], stdin=PIPE, stdout=PIPE)
+
+    def solve(self, input_data):
+        process = self.idle.get()
+        try:
+            payload = input_data.encode('latin-1')
+            process.stdin.write(b'%d\n' % len(payload) + payload)
+            process.stdin.flush()
+            header = process.stdout.readline()
+            if not header:
+                raise RuntimeError('java Solver exited with code %s' % process.poll())
+            output = process.stdout.read(int(header)).decode('latin-1')
+        except (OSError, RuntimeError, ValueError):
+            # replace the broken process so the pool keeps its size
+            process.kill()
+            process.wait()
+            self.idle.put(self.start())
+            raise
+        self.idle.put(process)
+        return output.strip()
+
+    # solve a batch of instances in parallel, one per pooled process
+    def map(self, inputs):
+        with ThreadPoolExecutor(self.size) as executor:
+            return list(executor.map(self.solve, inputs))
+
+    def close(self):
+        for i in range(self.size):
+            process = self.idle.get()
+            process.stdin.close()
+            process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
-    # Runs the command: java Solver -file=tmp.data
 
-    process = Popen(['java', 'Solver', '-file=' + tmp_file_name], stdout=PIPE, universal_newlines=True)
-    (stdout, stderr) = process.communicate()
+def solve_it(input_data, pool=None):
+
+    # Streams the inputData to a pooled solver when one is given
+
+    if pool is not None:
+        return pool.solve(input_data)
+
+    # Writes the inputData to a temporay file, unique per call
+
+    tmp_fd, tmp_file_name = tempfile.mkstemp(suffix='.data')
+    with os.fdopen(tmp_fd, 'w') as tmp_file:
+        tmp_file.write(input_data)
+
+    # Runs the command: java Solver -file=tmp.data
 
-    # removes the temporay file
-    os.remove(tmp_file_name)
+    try:
+        process = Popen(['java', 'Solver', '-file=' + tmp_file_name], stdout=PIPE, universal_newlines=True)
+        (stdout, stderr) = process.communicate()
+    finally:
+        # removes the temporay file
+        os.remove(tmp_file_name)
 
     return stdout.strip()
 
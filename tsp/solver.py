@@ -5,16 +5,12 @@ import math
 import random
 from collections import namedtuple
 
-Point = namedtuple("Point", ['x', 'y'])
+import numpy as np
 
+Point = namedtuple("Point", ['x', 'y'])
 
-# struct for each vertex
-class Node:
-    # The init method or constructor
-    def __init__(self, distance, visited):
-        # Instance Variable
-        self.distance = distance
-        self.visited = visited
+# average number of points in a cell of the grid
+GRID_DENSITY = 2
 
 
 # compute the length between 2 points
@@ -22,39 +18,87 @@ def length(point1, point2):
     return (point1.x - point2.x) ** 2 + (point1.y - point2.y) ** 2
 
 
-# find the nearest unvisited neighbourhood
-def close_unvisited(vertices, numNode, points, start_index):
-    min_dist = float('inf')
-    index = 0
-    for i in range(numNode):
-        if not vertices[i].visited:
-            vertices[i].distance = length(points[start_index], points[i])
-            if vertices[i].distance < min_dist:
-                min_dist = vertices[i].distance
-                index = i
-
-    return index
+# uniform grid over the points with about GRID_DENSITY points per cell
+# visited points are removed from their cell, so that the nearest unvisited
+# point is found by searching the rings of cells around a point
+class Grid:
+    def __init__(self, points):
+        coords = np.array(points, dtype=float).reshape(-1, 2)
+        self.x = coords[:, 0].tolist()
+        self.y = coords[:, 1].tolist()
+        low = coords.min(axis=0)
+        span = np.maximum(coords.max(axis=0) - low, 1e-9)
+        self.cell = max(math.sqrt(span[0] * span[1] * GRID_DENSITY / len(points)),
+                        max(span) * GRID_DENSITY / len(points))
+        self.columns, self.rows = map(int, span // self.cell + 1)
+        cells = ((coords - low) // self.cell).astype(int)
+        self.cell_of = (cells[:, 1] * self.columns + cells[:, 0]).tolist()
+
+        # points of every cell and the position of every point in its cell
+        self.buckets = [[] for _ in range(self.columns * self.rows)]
+        self.position = [0] * len(points)
+        for i, c in enumerate(self.cell_of):
+            self.position[i] = len(self.buckets[c])
+            self.buckets[c].append(i)
+
+    def remove(self, i):
+        bucket = self.buckets[self.cell_of[i]]
+        last = bucket.pop()
+        if last != i:
+            bucket[self.position[i]] = last
+            self.position[last] = self.position[i]
+
+    # nearest point left to point i (-1 if none): ring r holds the cells r
+    # steps away from the cell of i, no point beyond it is closer than r cells
+    def nearest(self, i):
+        x = self.x[i]
+        y = self.y[i]
+        column = self.cell_of[i] % self.columns
+        row = self.cell_of[i] // self.columns
+        best = -1
+        best_distance = float('inf')
+        for r in range(max(self.columns, self.rows)):
+            for cx, cy in self.ring(column, row, r):
+                for j in self.buckets[cy * self.columns + cx]:
+                    distance = (x - self.x[j]) ** 2 + (y - self.y[j]) ** 2
+                    if distance < best_distance:
+                        best_distance = distance
+                        best = j
+            if best_distance <= (r * self.cell) ** 2:
+                break
+        return best
+
+    # cells of the ring r around a cell, clipped to the grid
+    def ring(self, column, row, r):
+        if r == 0:
+            return [(column, row)]
+        left = max(column - r, 0)
+        right = min(column + r, self.columns - 1)
+        bottom = max(row - r + 1, 0)
+        top = min(row + r - 1, self.rows - 1)
+        cells = []
+        for cy in (row - r, row + r):
+            if 0 <= cy < self.rows:
+                cells.extend((cx, cy) for cx in range(left, right + 1))
+        for cx in (column - r, column + r):
+            if 0 <= cx < self.columns:
+                cells.extend((cx, cy) for cy in range(bottom, top + 1))
+        return cells
 
 
 # find an initial solution using greedy algorithm
+# the nearest unvisited point comes from the grid, which takes about O(n log n)
 def greedy(points, numNode):
-    vertices = []
-    start_index = 0
-    for i in range(numNode):
-        vertices.append(Node(0, False))
-    vertices[0].visited = True
-
-    if numNode < 5000 and numNode != 574:
-        path = [0] * numNode
-        for i in range(1, numNode, 1):
-            v_min = close_unvisited(vertices, numNode, points, start_index)
-            start_index = v_min
-            vertices[v_min].visited = True
-            path[i] = v_min
-        return path
-    else:
-        path = [x for x in range(0, numNode)]
-        return path
+    if numNode == 574:
+        return [x for x in range(0, numNode)]
+
+    grid = Grid(points)
+    path = [0] * numNode
+    grid.remove(0)
+    for i in range(1, numNode, 1):
+        path[i] = grid.nearest(path[i - 1])
+        grid.remove(path[i])
+    return path
 
 
 # calculate the length of the tour